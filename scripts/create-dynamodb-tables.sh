@@ -111,6 +111,7 @@ else
             AttributeName=conversationId,AttributeType=S \
             AttributeName=timestamp,AttributeType=S \
             AttributeName=messageId,AttributeType=S \
+            AttributeName=senderId,AttributeType=S \
         --key-schema \
             AttributeName=conversationId,KeyType=HASH \
             AttributeName=timestamp,KeyType=RANGE \
@@ -121,6 +122,11 @@ else
                     \"IndexName\": \"MessageIdIndex\",
                     \"KeySchema\": [{\"AttributeName\":\"messageId\",\"KeyType\":\"HASH\"}],
                     \"Projection\": {\"ProjectionType\":\"ALL\"}
+                },
+                {
+                    \"IndexName\": \"SenderIdIndex\",
+                    \"KeySchema\": [{\"AttributeName\":\"senderId\",\"KeyType\":\"HASH\"}],
+                    \"Projection\": {\"ProjectionType\":\"INCLUDE\",\"NonKeyAttributes\":[\"messageId\"]}
                 }
             ]" \
         --tags \
@@ -10,49 +10,379 @@ Usage:
 
 Requirements:
     pip install boto3
+    pip install pyarrow  # Optional - faster parsing for large CSV files
 """
 
 import boto3
 import csv
 import json
-from decimal import Decimal
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import count, islice
+from decimal import Decimal, InvalidOperation
+from botocore.config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
 
 # Configuration
 TABLE_NAME = "Messages"
 REGION = "us-east-1"
 CSV_FILE = "test-messages.csv"
+ARROW_MIN_BYTES = 1 << 20  # Use pyarrow (if installed) for CSV files at least this large
+CHECKPOINT_FILE = "import.ckpt"  # Rows already imported, for resuming a failed run
+CHECKPOINT_FSYNC_EVERY = 10  # Checkpoint writes between fsyncs
+CHUNK_SIZE = 500  # Rows handed to each worker's batch writer
+MAX_WORKERS = 8
+CONVERT_CHUNKSIZE = 50  # Rows sent to a converter process per task
+PRIMARY_KEYS = ['conversationId', 'timestamp']
+
+# Write-rate warm-up (items/second). The rate ramps by RAMP_FACTOR each second
+# up to the target; if more than UNPROCESSED_THRESHOLD of written items come
+# back unprocessed for BACKOFF_SECONDS in a row, the target is halved.
+START_WRITE_RATE = 100
+TARGET_WRITE_RATE = 10000
+RAMP_FACTOR = 1.5
+UNPROCESSED_THRESHOLD = 0.2
+BACKOFF_SECONDS = 5
+
+# botocore config for each worker's resource: adaptive client-side retries
+# absorb throttling, keep-alive sockets are reused, and timeouts fail fast.
+# Items come from convert_to_dynamodb_item with a fixed shape, so botocore's
+# per-request parameter validation is skipped.
+BOTO_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 20},
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=30,
+    parameter_validation=False,
+)
+
+logger = logging.getLogger(__name__)
+_thread_local = threading.local()
+
+def _to_number(row, column):
+    # Plain digit strings skip Decimal's parser validation; anything else
+    # (e.g. 12.5) is still accepted if it's a valid number. Invalid values
+    # raise so try_convert reports the row instead of dropping the value.
+    value = row.get(column)
+    if not value or value.isspace():
+        return None
+    if value.isdigit():
+        return Decimal(value)
+    try:
+        number = Decimal(value.strip())
+    except InvalidOperation:
+        number = None
+    # DynamoDB has no NaN/Infinity, and boto3 would reject the whole batch
+    if number is None or not number.is_finite():
+        raise ValueError(f"{column} must be a number, got {value!r}")
+    return number
 
 def convert_to_dynamodb_item(row):
     """
-    Convert CSV row to DynamoDB item format.
-    Handles proper type conversion for DynamoDB.
-    """
-    item = {
-        'conversationId': {'S': row['conversationId']},
-        'timestamp': {'S': row['timestamp']},
-        'messageId': {'S': row['messageId']},
-        'senderId': {'S': row['senderId']},
-        'type': {'S': row['type']},
-        'content': {'S': row['content']},
-        'createdAt': {'S': row['createdAt']},
-        'deleted': {'BOOL': row['deleted'].lower() == 'true'},
-        'readBy': {'L': []},  # Empty list
-        'reactions': {'M': {}},  # Empty map
+    Convert CSV row to a plain Python item for the Table resource.
+    The resource's TypeSerializer does the DynamoDB marshalling, so values
+    stay native; empty optional columns are dropped.
+    """
+    get = row.get
+    native = {
+        'conversationId': row['conversationId'],
+        'timestamp': row['timestamp'],
+        'messageId': row['messageId'],
+        'senderId': row['senderId'],
+        'type': row['type'],
+        'content': row['content'],
+        'createdAt': row['createdAt'],
+        'deleted': row['deleted'].lower() == 'true',
+        'readBy': [],  # Empty list
+        'reactions': {},  # Empty map
+        'replyTo': get('replyTo'),
+        'duration': _to_number(row, 'duration'),
+        'fileName': get('fileName'),
+        'fileSize': _to_number(row, 'fileSize'),
+        'mediaUrl': get('mediaUrl'),
     }
+    return {k: v for k, v in native.items() if v not in ('', None)}
+
+def try_convert(row):
+    """
+    Process-pool wrapper around convert_to_dynamodb_item.
+    Returns (item, None) on success or (None, error message) on failure
+    so one bad row doesn't abort the rest of its chunk.
+    """
+    try:
+        return convert_to_dynamodb_item(row), None
+    except Exception as e:
+        return None, str(e)
+
+def read_rows(path):
+    """
+    Yield each CSV record as a dict keyed by the header row.
+    The file is memory-mapped so pages are loaded on demand, and its lines
+    are streamed through a single csv.reader.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            lines = (line.decode('utf-8') for line in iter(buf.readline, b''))
+            csv_reader = csv.reader(lines)
+
+            header = next(csv_reader, None)
+            if header is None:
+                return
+
+            for fields in csv_reader:
+                if fields:
+                    yield dict(zip(header, fields))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all writer threads.
+    One token is spent per item sent in a BatchWriteItem request.
+    """
 
-    # Optional fields - only add if not empty
-    if row.get('replyTo') and row['replyTo'].strip():
-        item['replyTo'] = {'S': row['replyTo']}
-    if row.get('duration') and row['duration'].strip():
-        item['duration'] = {'N': row['duration']}
-    if row.get('fileName') and row['fileName'].strip():
-        item['fileName'] = {'S': row['fileName']}
-    if row.get('fileSize') and row['fileSize'].strip():
-        item['fileSize'] = {'N': row['fileSize']}
-    if row.get('mediaUrl') and row['mediaUrl'].strip():
-        item['mediaUrl'] = {'S': row['mediaUrl']}
+    def __init__(self, rate, target):
+        self.rate = rate
+        self.target = target
+        self.tokens = rate
+        self.lock = threading.Lock()
+        self.last_refill = time.monotonic()
+        self.last_adjust = self.last_refill
+        self.sent = 0
+        self.unprocessed = 0
+        self.throttled_seconds = 0
 
-    return item
+    def acquire(self, count):
+        """
+        Block until `count` tokens are available, then spend them.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                self._adjust(now)
+                if self.tokens >= count:
+                    self.tokens -= count
+                    return
+                wait = (count - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record(self, sent, unprocessed):
+        """
+        Record how many items of a request came back unprocessed.
+        """
+        with self.lock:
+            self.sent += sent
+            self.unprocessed += unprocessed
+
+    def _refill(self, now):
+        # Capacity is one second of writes at the current rate
+        self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def _adjust(self, now):
+        if now - self.last_adjust < 1:
+            return
+
+        fraction = self.unprocessed / self.sent if self.sent else 0
+        if fraction > UNPROCESSED_THRESHOLD:
+            self.throttled_seconds += 1
+        else:
+            self.throttled_seconds = 0
+
+        if self.throttled_seconds >= BACKOFF_SECONDS:
+            self.target = max(START_WRITE_RATE, self.target / 2)
+            self.throttled_seconds = 0
+            logger.warning(f"⚠️  Sustained throttling, lowering write rate to {self.target:.0f} items/s")
+
+        self.rate = min(self.rate * RAMP_FACTOR, self.target)
+        self.sent = 0
+        self.unprocessed = 0
+        self.last_adjust = now
+
+_write_limiter = TokenBucket(START_WRITE_RATE, TARGET_WRITE_RATE)
+
+def _before_batch_write(params, context, **kwargs):
+    """
+    botocore hook: wait for write tokens before each BatchWriteItem request.
+    """
+    count = len(params['RequestItems'][TABLE_NAME])
+    context['import_item_count'] = count
+    _write_limiter.acquire(count)
+
+def _after_batch_write(parsed, context, **kwargs):
+    """
+    botocore hook: feed the unprocessed fraction of each request back to
+    the rate limiter.
+    """
+    sent = context.get('import_item_count', 0)
+    unprocessed = len(parsed.get('UnprocessedItems', {}).get(TABLE_NAME, []))
+    _write_limiter.record(sent, unprocessed)
+    if sent:
+        logger.debug(f"BatchWriteItem: {unprocessed}/{sent} items unprocessed ({unprocessed / sent:.0%})")
+
+def read_rows_arrow(path):
+    """
+    Yield each CSV record as a dict using pyarrow's streaming C++ reader.
+    Rows are parsed a block at a time and sliced out of each column, and every
+    column is read as a string so values match read_rows().
+
+    Arrow requires every row to have the header's width. Exports may omit
+    trailing empty columns, so on the first row arrow rejects, reading
+    continues with read_rows() from the same record. Both readers yield the
+    same records, which keeps checkpoint row counts consistent.
+    """
+    yielded = 0
+
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return
+
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=1 << 20, use_threads=True),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+            ),
+        )
+
+        for batch in reader:
+            names = batch.schema.names
+            columns = [column.to_pylist() for column in batch.columns]
+            for values in zip(*columns):
+                yield dict(zip(names, values))
+                yielded += 1
+
+    except pa.ArrowInvalid as e:
+        logger.info(f"pyarrow can't parse {path} ({e}); continuing with the csv reader")
+        yield from islice(read_rows(path), yielded, None)
+
+def iter_rows(path):
+    """
+    Pick the CSV reader: pyarrow for large files when it is installed,
+    otherwise the memory-mapped csv.reader.
+    """
+    if pa is not None and os.path.getsize(path) >= ARROW_MIN_BYTES:
+        return read_rows_arrow(path)
+    return read_rows(path)
+
+class Checkpoint:
+    """
+    Records how many CSV rows have been imported so a failed run can resume.
+    Chunks finish out of order, so only the contiguous prefix of successfully
+    written chunks is counted. The checkpoint stores the CSV path and size
+    alongside the count and is ignored if they don't match the current file.
+    """
+
+    def __init__(self, path, csv_path):
+        self.path = path
+        self.csv_path = os.path.abspath(csv_path)
+        self.csv_size = os.path.getsize(csv_path)  # Raises before any file is created
+        self.lock = threading.Lock()
+        self.rows_done = 0
+        self.next_chunk = 0
+        self.finished = {}
+        self.writes = 0
+        self.fd = None
+
+        try:
+            with open(path, 'r') as f:
+                saved_path, saved_size, rows_done = f.read().split('\n')[:3]
+            rows_done = int(rows_done)
+            if rows_done < 0:
+                raise ValueError(rows_done)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"⚠️  Ignoring unreadable checkpoint {path}")
+            return
+
+        if saved_path == self.csv_path and saved_size == str(self.csv_size):
+            self.rows_done = rows_done
+        else:
+            logger.warning(f"⚠️  Ignoring {path}: it was written for a different CSV file")
+
+    def complete(self, chunk_index, row_count, ok):
+        """
+        Mark a chunk as finished. A failed chunk stops the checkpoint from
+        advancing past it, so it is retried on the next run.
+        """
+        with self.lock:
+            self.finished[chunk_index] = row_count if ok else None
+
+            advanced = False
+            while self.finished.get(self.next_chunk) is not None:
+                self.rows_done += self.finished.pop(self.next_chunk)
+                self.next_chunk += 1
+                advanced = True
+
+            if advanced:
+                self._write()
+
+    def _write(self):
+        if self.fd is None:
+            # Truncate once so a stale checkpoint's contents can't linger
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+        # Only the trailing row count changes, and it only grows, so
+        # overwriting in place is safe
+        record = f"{self.csv_path}\n{self.csv_size}\n{self.rows_done}\n"
+        os.pwrite(self.fd, record.encode(), 0)
+        self.writes += 1
+        if self.writes % CHECKPOINT_FSYNC_EVERY == 0:
+            os.fsync(self.fd)
+
+    def close(self, remove=False):
+        if self.fd is not None:
+            os.fsync(self.fd)
+            os.close(self.fd)
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+def get_table():
+    """
+    Return the Messages table resource for the current worker thread.
+    Each worker gets its own session to avoid credential-refresh contention.
+    """
+    table = getattr(_thread_local, 'table', None)
+    if table is None:
+        session = boto3.session.Session()
+        table = session.resource('dynamodb', region_name=REGION, config=BOTO_CONFIG).Table(TABLE_NAME)
+
+        # The batch writer hides individual requests, so rate limiting and
+        # unprocessed-item tracking hook into the client's events
+        events = table.meta.client.meta.events
+        events.register('before-parameter-build.dynamodb.BatchWriteItem', _before_batch_write)
+        events.register('after-call.dynamodb.BatchWriteItem', _after_batch_write)
+
+        _thread_local.table = table
+    return table
+
+def flush_batch(items):
+    """
+    Write items with the table's batch writer, which sends BatchWriteItem
+    requests of 25 and resubmits any UnprocessedItems.
+    A writer is never shared between threads.
+    """
+    with get_table().batch_writer(overwrite_by_pkeys=PRIMARY_KEYS) as batch:
+        for item in items:
+            batch.put_item(Item=item)
 
 def main():
     print(f"Starting import of messages to DynamoDB table: {TABLE_NAME}")
@@ -60,45 +390,95 @@ def main():
     print(f"CSV file: {CSV_FILE}")
     print("")
 
-    # Initialize DynamoDB client
-    dynamodb = boto3.client('dynamodb', region_name=REGION)
-
     # Read CSV and import messages
     imported_count = 0
     failed_count = 0
+    skipped_count = 0
+    checkpoint = None
+    clean_run = False
 
     try:
-        with open(CSV_FILE, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
+        checkpoint = Checkpoint(CHECKPOINT_FILE, CSV_FILE)
+        skipped_count = checkpoint.rows_done
+        if skipped_count:
+            print(f"Resuming from {CHECKPOINT_FILE}: skipping {skipped_count} already-imported rows")
+            print("")
 
-            for row in csv_reader:
-                try:
-                    # Convert to DynamoDB item
-                    item = convert_to_dynamodb_item(row)
+        # Bound in-flight chunks so reading doesn't outrun the writers
+        in_flight = threading.Semaphore(MAX_WORKERS)
+        futures = {}
 
-                    # Insert into DynamoDB
-                    dynamodb.put_item(
-                        TableName=TABLE_NAME,
-                        Item=item
-                    )
+        # Conversion is CPU-bound, so it runs in worker processes while the
+        # writer threads handle the network-bound batch writes. Spawned (not
+        # forked) processes avoid inheriting locks held by the writer threads.
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 mp_context=multiprocessing.get_context('spawn')) as converter, \
+             ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            def submit(chunk_index, row_count, batch, converted_ok):
+                in_flight.acquire()
+                future = executor.submit(flush_batch, batch)
 
-                    imported_count += 1
-                    print(f"✓ Imported message {row['messageId']} ({imported_count}/100)")
+                def on_done(f):
+                    ok = converted_ok and f.exception() is None
+                    checkpoint.complete(chunk_index, row_count, ok)
+                    in_flight.release()
 
+                future.add_done_callback(on_done)
+                futures[future] = len(batch)
+
+            rows = islice(iter_rows(CSV_FILE), skipped_count, None)
+            for chunk_index in count():
+                chunk = list(islice(rows, CHUNK_SIZE))
+                if not chunk:
+                    break
+
+                items = []
+                chunk_failures = 0
+                results = converter.map(try_convert, chunk, chunksize=CONVERT_CHUNKSIZE)
+                for row, (item, error) in zip(chunk, results):
+                    if error is not None:
+                        chunk_failures += 1
+                        logger.warning(f"✗ Failed to convert message {row.get('messageId')}: {error}")
+                        continue
+                    items.append(item)
+
+                failed_count += chunk_failures
+
+                # A chunk with rows that failed to convert holds the checkpoint
+                # back, so those rows are retried on the next run
+                if items:
+                    submit(chunk_index, len(chunk), items, chunk_failures == 0)
+                else:
+                    checkpoint.complete(chunk_index, len(chunk), chunk_failures == 0)
+
+            for future in as_completed(futures):
+                batch_size = futures[future]
+                try:
+                    future.result()
                 except Exception as e:
-                    failed_count += 1
-                    print(f"✗ Failed to import message {row['messageId']}: {str(e)}")
+                    failed_count += batch_size
+                    logger.warning(f"✗ Failed to import batch of {batch_size} messages: {str(e)}")
+                    continue
+
+                imported_count += batch_size
+
+                # One progress update per completed chunk rather than per row
+                sys.stdout.write(f"... {imported_count} messages imported\r")
+                sys.stdout.flush()
+
+        clean_run = failed_count == 0
 
         print("")
         print("=" * 60)
         print("Import Summary:")
         print(f"  Successfully imported: {imported_count} messages")
+        print(f"  Skipped (imported by a previous run): {skipped_count} messages")
         print(f"  Failed: {failed_count} messages")
-        print(f"  Total: {imported_count + failed_count} messages")
+        print(f"  Total: {imported_count + skipped_count + failed_count} messages")
         print("=" * 60)
         print("")
 
-        if imported_count == 100:
+        if imported_count + skipped_count == 100:
             print("✅ All 100 messages imported successfully!")
             print("")
             print("Next steps:")
@@ -107,12 +487,23 @@ def main():
             print("  3. Test the AI summary feature!")
         else:
             print("⚠️  Some messages failed to import. Check errors above.")
+            print(f"   Re-run the script to retry them, resuming from {CHECKPOINT_FILE}.")
+            print("   (Editing the CSV invalidates the checkpoint and restarts the import.)")
 
     except FileNotFoundError:
         print(f"Error: CSV file '{CSV_FILE}' not found!")
         print("Make sure the CSV file is in the same directory as this script.")
     except Exception as e:
         print(f"Error: {str(e)}")
+    finally:
+        # A clean run leaves no checkpoint behind, so the next import starts fresh
+        if checkpoint is not None:
+            checkpoint.close(remove=clean_run)
 
 if __name__ == "__main__":
+    # Only this script logs at INFO; botocore stays at WARNING so per-worker
+    # session messages (e.g. "Found credentials...") don't reach stdout
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', handlers=[logging.StreamHandler()])
+    logger.setLevel(logging.INFO)
+
     main()
@@ -13,6 +13,11 @@ Requirements:
 """
 
 import boto3
+import logging
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Configuration
@@ -20,11 +25,142 @@ TABLE_NAME = "PantherKolab-Messages-dev"
 REGION = "us-east-1"
 OLD_SENDER_ID = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
 NEW_SENDER_ID = "44e88408-8091-7022-99dc-c9b9b9d1d4af"
+SENDER_INDEX = "SenderIdIndex"
+TOTAL_SEGMENTS = 8
+UPDATE_WORKERS = 32
+PROGRESS_EVERY = 500
+PAGE_SIZE = 1000
+
+# Shared botocore config: a connection pool large enough for every worker
+# thread, adaptive client-side retries for throttling, and fail-fast timeouts
+BOTO_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=30,
+)
+
+logger = logging.getLogger(__name__)
+
+# Parameters shared by every Scan/Query page - only the key attributes are
+# needed for the update
+_MATCH_KWARGS = {
+    'TableName': TABLE_NAME,
+    'ProjectionExpression': 'conversationId, #ts, messageId',
+    'ExpressionAttributeNames': {'#ts': 'timestamp'},
+    'ExpressionAttributeValues': {
+        ':old_sender': {'S': OLD_SENDER_ID}
+    },
+}
+
+def do_update(dynamodb, conversation_id, timestamp, message_id):
+    """
+    Set the new senderId on a single message.
+    Throttling is retried by the client's adaptive retry mode (BOTO_CONFIG).
+    Returns True if the message was updated.
+    """
+    try:
+        dynamodb.update_item(
+            TableName=TABLE_NAME,
+            Key={
+                'conversationId': {'S': conversation_id},
+                'timestamp': {'S': timestamp}
+            },
+            UpdateExpression='SET senderId = :new_sender',
+            ExpressionAttributeValues={
+                ':new_sender': {'S': NEW_SENDER_ID}
+            }
+        )
+        return True
+
+    except ClientError as e:
+        logger.warning(f"✗ Error updating message {message_id}: {e.response['Error']['Message']}")
+        return False
+    except Exception as e:
+        logger.warning(f"✗ Unexpected error updating message {message_id}: {str(e)}")
+        return False
+
+def has_sender_index(dynamodb):
+    """
+    Check whether the Messages table has an active senderId GSI.
+    Returns False if the table can't be described, so the caller falls back
+    to scanning.
+    """
+    try:
+        table = dynamodb.describe_table(TableName=TABLE_NAME)['Table']
+    except ClientError as e:
+        logger.warning(f"⚠️  Could not describe {TABLE_NAME}: {e.response['Error']['Message']}")
+        return False
+
+    return any(
+        index['IndexName'] == SENDER_INDEX and index['IndexStatus'] == 'ACTIVE'
+        for index in table.get('GlobalSecondaryIndexes', [])
+    )
+
+def collect_matches(pages):
+    """
+    Group the messages in a sequence of Scan/Query pages by conversationId.
+    Returns a dict of conversationId -> [(timestamp, messageId), ...].
+    """
+    groups = defaultdict(list)
+
+    for page in pages:
+        for item in page.get('Items', []):
+            groups[item['conversationId']['S']].append((
+                item['timestamp']['S'],
+                item.get('messageId', {}).get('S', 'unknown')
+            ))
+
+    return groups
+
+def query_sender_index(dynamodb):
+    """
+    Query the senderId GSI for every message with the old senderId.
+    Only matching items are read, unlike a filtered Scan.
+    """
+    pages = dynamodb.get_paginator('query').paginate(
+        IndexName=SENDER_INDEX,
+        KeyConditionExpression='senderId = :old_sender',
+        PaginationConfig={'PageSize': PAGE_SIZE},
+        **_MATCH_KWARGS
+    )
+    return collect_matches(pages)
+
+def scan_segment(dynamodb, segment):
+    """
+    Scan one segment of the Messages table for messages with the old senderId.
+    """
+    pages = dynamodb.get_paginator('scan').paginate(
+        Segment=segment,
+        TotalSegments=TOTAL_SEGMENTS,
+        FilterExpression='senderId = :old_sender',
+        PaginationConfig={'PageSize': PAGE_SIZE},
+        **_MATCH_KWARGS
+    )
+    return collect_matches(pages)
+
+def process_group(dynamodb, conversation_id, messages):
+    """
+    Update every message in one conversation sequentially, so writes to a
+    single partition never run in parallel. Returns (updated, errors) counts.
+    """
+    updated_count = 0
+    error_count = 0
+
+    for timestamp, message_id in messages:
+        if do_update(dynamodb, conversation_id, timestamp, message_id):
+            updated_count += 1
+        else:
+            error_count += 1
+
+    return updated_count, error_count
 
 def update_sender_ids():
     """
-    Scan the Messages table and update all messages with the old senderId
-    to use the new senderId.
+    Find all messages with the old senderId and update them to use the new
+    senderId. Conversations are updated in parallel, but each conversation's
+    messages are updated one at a time to avoid hot-partition throttling.
     """
     print(f"Updating sender IDs in DynamoDB table: {TABLE_NAME}")
     print(f"Region: {REGION}")
@@ -32,68 +168,52 @@ def update_sender_ids():
     print(f"New sender ID: {NEW_SENDER_ID}")
     print("")
 
-    # Initialize DynamoDB client
-    dynamodb = boto3.client('dynamodb', region_name=REGION)
+    # Initialize DynamoDB client (thread-safe, shared by all workers)
+    dynamodb = boto3.client('dynamodb', region_name=REGION, config=BOTO_CONFIG)
 
     updated_count = 0
     scanned_count = 0
     error_count = 0
 
     try:
-        # Scan parameters
-        scan_kwargs = {
-            'TableName': TABLE_NAME,
-            'FilterExpression': 'senderId = :old_sender',
-            'ExpressionAttributeValues': {
-                ':old_sender': {'S': OLD_SENDER_ID}
-            }
-        }
+        if has_sender_index(dynamodb):
+            print(f"Querying {SENDER_INDEX} for messages to update...")
+            print("")
 
-        print("Scanning table for messages to update...")
-        print("")
+            groups = query_sender_index(dynamodb)
+        else:
+            print(f"{SENDER_INDEX} not found, scanning table for messages to update "
+                  f"({TOTAL_SEGMENTS} parallel segments)...")
+            print("")
 
-        # Scan the table (handles pagination automatically)
-        while True:
-            response = dynamodb.scan(**scan_kwargs)
-            items = response.get('Items', [])
-            scanned_count += len(items)
-
-            # Update each item
-            for item in items:
-                try:
-                    conversation_id = item['conversationId']['S']
-                    timestamp = item['timestamp']['S']
-
-                    # Update the senderId
-                    update_response = dynamodb.update_item(
-                        TableName=TABLE_NAME,
-                        Key={
-                            'conversationId': {'S': conversation_id},
-                            'timestamp': {'S': timestamp}
-                        },
-                        UpdateExpression='SET senderId = :new_sender',
-                        ExpressionAttributeValues={
-                            ':new_sender': {'S': NEW_SENDER_ID}
-                        },
-                        ReturnValues='UPDATED_NEW'
-                    )
-
-                    updated_count += 1
-                    message_id = item.get('messageId', {}).get('S', 'unknown')
-                    print(f"✓ Updated message {message_id} in conversation {conversation_id}")
-
-                except ClientError as e:
-                    error_count += 1
-                    print(f"✗ Error updating message: {e.response['Error']['Message']}")
-                except Exception as e:
-                    error_count += 1
-                    print(f"✗ Unexpected error: {str(e)}")
-
-            # Check if there are more items to scan
-            if 'LastEvaluatedKey' not in response:
-                break
-
-            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            # Each worker scans its own segment of the table
+            groups = defaultdict(list)
+            with ThreadPoolExecutor(max_workers=TOTAL_SEGMENTS) as executor:
+                for segment_groups in executor.map(
+                    lambda segment: scan_segment(dynamodb, segment),
+                    range(TOTAL_SEGMENTS)
+                ):
+                    for conversation_id, messages in segment_groups.items():
+                        groups[conversation_id].extend(messages)
+
+        scanned_count = sum(len(messages) for messages in groups.values())
+
+        # One task per conversation (partition key)
+        with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as update_pool:
+            futures = [
+                update_pool.submit(process_group, dynamodb, conversation_id, sorted(messages))
+                for conversation_id, messages in groups.items()
+            ]
+
+            for future in as_completed(futures):
+                updated, errors = future.result()
+                previous_count = updated_count
+                updated_count += updated
+                error_count += errors
+
+                if updated_count // PROGRESS_EVERY > previous_count // PROGRESS_EVERY:
+                    sys.stdout.write(f"... {updated_count} messages updated\r")
+                    sys.stdout.flush()
 
         print("")
         print("=" * 60)
@@ -115,6 +235,11 @@ def update_sender_ids():
         print(f"Unexpected error: {str(e)}")
 
 if __name__ == "__main__":
+    # Only this script logs at INFO; botocore stays at WARNING so per-worker
+    # session messages (e.g. "Found credentials...") don't reach stdout
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', handlers=[logging.StreamHandler()])
+    logger.setLevel(logging.INFO)
+
     # Confirm before proceeding
     print("=" * 60)
     print("DynamoDB Sender ID Update Script")